@@ -5,26 +5,84 @@ A clean and minimal web UI for browsing video files and displaying their metadat
 """
 
 import os
+import re
+import atexit
 import json
+import sqlite3
 import subprocess
+import threading
 import time
-from pathlib import Path
+from collections import Counter
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+import orjson
 from flask import Flask, render_template, jsonify, request
 from urllib.parse import unquote
 
+try:
+    import av
+except ImportError:  # PyAV is optional; without it every probe shells out to ffprobe
+    av = None
+
 app = Flask(__name__)
 
 # Configuration - can be overridden by environment variables
 MEDIA_ROOT = os.getenv('MEDIA_ROOT', '/mnt/wd_2tb/media')
+# Resolved once with exactly one trailing separator (a root of '/' stays '/');
+# request paths must resolve to this directory or below it
+MEDIA_ROOT_REAL = os.path.join(os.path.realpath(MEDIA_ROOT), '')
 HOST = os.getenv('HOST', '0.0.0.0')
 PORT = int(os.getenv('PORT', 5000))
-DEBUG = os.getenv('FLASK_ENV', 'development') == 'development'
+# The Werkzeug debugger allows code execution, so it is opt-in only
+DEBUG = os.getenv('FLASK_DEBUG', '0') == '1'
+
+# Number of files probed concurrently during bulk analysis
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', (os.cpu_count() or 1) * 2))
+
+# Folder video counts stop walking at this many videos and display as "N+"
+FOLDER_COUNT_LIMIT = int(os.getenv('FOLDER_COUNT_LIMIT', 1000))
+
+# Number of subfolders walked concurrently when counting a folder's videos;
+# kept low by default so spinning disks are not thrashed
+SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', 8))
+
+# Seconds a folder listing is reused for repeat /api/browse requests
+BROWSE_CACHE_SECONDS = 5
+
+# Seconds a single probe may block on I/O before the file is skipped
+PROBE_TIMEOUT = 30
+
+# Progress frames in the bulk analysis event stream are sent every this many files,
+# or sooner once this many seconds have passed since the last one
+PROGRESS_CHECKPOINT_INTERVAL = 25
+PROGRESS_MIN_SECONDS = 0.25
+
+# Shared across requests so concurrent analyses cannot oversubscribe the host
+ANALYSIS_EXECUTOR = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS)
+ANALYSIS_QUEUE_DEPTH = ANALYSIS_WORKERS * 2
+SCAN_EXECUTOR = ThreadPoolExecutor(max_workers=SCAN_WORKERS)
 
 SUPPORTED_EXTENSIONS = {'.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.mpg', '.mpeg', '.3gp'}
+SUBTITLE_EXTENSIONS = {'.srt', '.ass', '.ssa', '.sub', '.idx', '.vtt'}
+
+# Tuples allow a single str.endswith() call per filename
+SUPPORTED_EXT_TUPLE = tuple(SUPPORTED_EXTENSIONS)
+SUBTITLE_EXT_TUPLE = tuple(SUBTITLE_EXTENSIONS)
+
+# Remainder of a subtitle filename after the video name, e.g. ".en.srt" in "Movie.en.srt".
+# Captures the first language code that appears as a separate token, plus the extension.
+SUBTITLE_SUFFIX_RE = re.compile(
+    r'(?:.*?[._-](en|es|fr|de|it|pt|ja|ko|zh)(?=[._-]))?.*\.(' +
+    '|'.join(re.escape(ext[1:]) for ext in sorted(SUBTITLE_EXTENSIONS)) +
+    r')',
+    re.IGNORECASE | re.DOTALL
+)
 
 # Configuration file for codec compatibility
 CONFIG_FILE = os.getenv('CONFIG_FILE', 'config.json')
 CACHE_FILE = os.getenv('CACHE_FILE', 'analysis_cache.json')
+METADATA_CACHE_FILE = os.getenv('METADATA_CACHE_FILE', 'metadata_cache.db')
+COUNT_CACHE_FILE = os.getenv('COUNT_CACHE_FILE', 'folder_counts.json')
 
 def load_codec_config():
     """Load codec compatibility configuration from file."""
@@ -66,21 +124,27 @@ def save_codec_config(config):
         print(f"Error saving config file: {e}")
         return False
 
+def build_problematic_sets(config):
+    """Build lowercased audio and video problematic codec sets from a config."""
+    problematic = config.get("problematic_codecs", {})
+    return (
+        frozenset(codec.lower() for codec in problematic.get("audio", [])),
+        frozenset(codec.lower() for codec in problematic.get("video", []))
+    )
+
 def is_audio_problematic(audio_codec, config=None):
     """Check if an audio codec is marked as problematic."""
     if config is None:
-        config = CODEC_CONFIG  # Use the global config instead of reloading
+        return audio_codec.lower() in PROBLEMATIC_CODECS[0]
     
-    problematic_audio = config.get("problematic_codecs", {}).get("audio", [])
-    return audio_codec.lower() in [codec.lower() for codec in problematic_audio]
+    return audio_codec.lower() in build_problematic_sets(config)[0]
 
 def is_video_problematic(video_codec, config=None):
     """Check if a video codec is marked as problematic."""
     if config is None:
-        config = CODEC_CONFIG
+        return video_codec.lower() in PROBLEMATIC_CODECS[1]
     
-    problematic_video = config.get("problematic_codecs", {}).get("video", [])
-    return video_codec.lower() in [codec.lower() for codec in problematic_video]
+    return video_codec.lower() in build_problematic_sets(config)[1]
 
 def get_primary_audio_track(audio_tracks):
     """Identify the primary audio track from a list of audio tracks."""
@@ -95,8 +159,50 @@ def get_primary_audio_track(audio_tracks):
     # If no default, return first track
     return audio_tracks[0]
 
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+SIZE_DIVISORS = tuple(1 << (unit_index * 10) for unit_index in range(len(SIZE_UNITS)))
+SIZE_MAX_UNIT = len(SIZE_UNITS) - 1
+
+def human_size(size_bytes):
+    """Format a byte count as a human readable size string."""
+    # Each unit spans 10 bits, so the unit follows directly from the bit length
+    unit_index = min(max(size_bytes.bit_length() - 1, 0) // 10, SIZE_MAX_UNIT)
+    return f"{size_bytes / SIZE_DIVISORS[unit_index]:.1f} {SIZE_UNITS[unit_index]}"
+
+# Minimum video heights for each resolution label; shorter videos get no label
+RESOLUTION_THRESHOLDS = (480, 720, 1080, 1440, 2160)
+RESOLUTION_LABELS = (None, ' (480p)', ' (720p)', ' (1080p)', ' (1440p)', ' (4K)')
+
+# ffprobe reports frame rates as a rational, e.g. "24000/1001"
+FRAMERATE_RE = re.compile(r'(\d+)/(\d+)')
+
+def format_duration(duration_seconds):
+    """Format a duration in seconds as HH:MM:SS."""
+    minutes, seconds = divmod(int(duration_seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+def format_bitrate(bitrate_bps):
+    """Format a bitrate in bits per second as kbps."""
+    return f"{bitrate_bps / 1000:.0f} kbps"
+
+def format_framerate(framerate):
+    """Format an ffprobe rational frame rate as fps, or None if it is unusable."""
+    match = FRAMERATE_RE.fullmatch(framerate)
+    if not match:
+        return None
+    
+    numerator, denominator = int(match.group(1)), int(match.group(2))
+    if denominator == 0:
+        return None
+    return f"{numerator / denominator:.2f} fps"
+
 # Load configuration at startup
 CODEC_CONFIG = load_codec_config()
+# (audio, video) codec sets kept in one global so readers always see a matching pair
+PROBLEMATIC_CODECS = build_problematic_sets(CODEC_CONFIG)
+# Serializes config updates so the saved file and the in-memory sets come from the same request
+CONFIG_LOCK = threading.Lock()
 
 def load_analysis_cache():
     """Load cached analysis results from file."""
@@ -147,213 +253,378 @@ def file_needs_reanalysis(file_path, cached_file_data):
     except (OSError, KeyError):
         return True  # Re-analyze if we can't determine
 
-def get_video_info(file_path):
-    """Extract comprehensive video metadata using ffprobe."""
+def init_metadata_cache():
+    """Open the persistent ffprobe metadata cache database."""
     try:
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            file_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode != 0:
-            return None
-            
-        data = json.loads(result.stdout)
-        
-        # Initialize comprehensive video info structure
-        video_info = {
-            'duration': None,
-            'size': None,
-            'bitrate': None,
-            'container': None,
-            'video': {
-                'codec': None,
-                'resolution': None,
-                'framerate': None,
-                'bitrate': None,
-                'profile': None,
-                'pixel_format': None,
-                'aspect_ratio': None
+        db = sqlite3.connect(METADATA_CACHE_FILE, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        # WAL stays consistent with NORMAL; a power loss can only drop the newest entries
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute('''
+            CREATE TABLE IF NOT EXISTS probe_cache (
+                path BLOB PRIMARY KEY,
+                mtime_ns INTEGER,
+                size INTEGER,
+                probe_json BLOB
+            )
+        ''')
+        db.commit()
+        return db
+    except sqlite3.Error as e:
+        print(f"Warning: Failed to open metadata cache: {e}")
+        return None
+
+# Shared connection; sqlite3 objects must not be used by two threads at once
+METADATA_DB = init_metadata_cache()
+METADATA_DB_LOCK = threading.Lock()
+
+def cached_probe_data(file_path):
+    """Return raw probe output for a file, reusing the cached copy if the file is unchanged."""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    
+    # Keyed on the raw filesystem bytes; names that are not valid UTF-8 arrive as
+    # surrogate-escaped str, which sqlite3 refuses to bind as text
+    key = os.fsencode(os.path.abspath(file_path))
+    
+    if METADATA_DB is not None:
+        try:
+            with METADATA_DB_LOCK:
+                row = METADATA_DB.execute(
+                    'SELECT probe_json FROM probe_cache WHERE path = ? AND mtime_ns = ? AND size = ?',
+                    (key, st.st_mtime_ns, st.st_size)
+                ).fetchone()
+            if row:
+                return orjson.loads(row[0])
+        except (sqlite3.Error, orjson.JSONDecodeError) as e:
+            print(f"Warning: Failed to read metadata cache for {file_path}: {e}")
+    
+    data = probe_file(file_path)
+    
+    if data is not None and METADATA_DB is not None:
+        try:
+            with METADATA_DB_LOCK:
+                METADATA_DB.execute('''
+                    INSERT INTO probe_cache (path, mtime_ns, size, probe_json) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(path) DO UPDATE SET
+                        mtime_ns = excluded.mtime_ns,
+                        size = excluded.size,
+                        probe_json = excluded.probe_json
+                ''', (key, st.st_mtime_ns, st.st_size, orjson.dumps(data)))
+                METADATA_DB.commit()
+        except (sqlite3.Error, orjson.JSONEncodeError) as e:
+            print(f"Warning: Failed to write metadata cache for {file_path}: {e}")
+    
+    return data
+
+def prune_metadata_cache(file_paths):
+    """Delete cached probe output for files a full library scan no longer found."""
+    if METADATA_DB is None:
+        return
+    
+    seen = {os.fsencode(os.path.abspath(path)) for path in file_paths}
+    
+    try:
+        with METADATA_DB_LOCK:
+            # Renamed or deleted files would otherwise keep their rows forever
+            stale = [row for row in METADATA_DB.execute('SELECT path FROM probe_cache') if row[0] not in seen]
+            if stale:
+                METADATA_DB.executemany('DELETE FROM probe_cache WHERE path = ?', stale)
+                METADATA_DB.commit()
+    except sqlite3.Error as e:
+        print(f"Warning: Failed to prune metadata cache: {e}")
+
+def run_ffprobe(file_path):
+    """Run ffprobe on a file and return its parsed JSON output."""
+    cmd = [
+        'ffprobe',
+        '-v', 'quiet',
+        '-print_format', 'json',
+        # Only request the fields parse_probe_data reads
+        '-show_entries', (
+            'format=duration,size,bit_rate,format_name'
+            ':stream=index,codec_type,codec_name,width,height,r_frame_rate,bit_rate,profile,pix_fmt,'
+            'display_aspect_ratio,channels,sample_rate,channel_layout'
+            ':stream_tags=language,title:stream_disposition=default,forced'
+        ),
+        file_path
+    ]
+    
+    # stdout stays as bytes; orjson parses UTF-8 directly without a decode pass
+    result = subprocess.run(cmd, capture_output=True, timeout=PROBE_TIMEOUT)
+    
+    if result.returncode != 0:
+        return None
+    
+    return orjson.loads(result.stdout)
+
+def probe_with_av(file_path):
+    """Read stream metadata in-process with PyAV, shaped like ffprobe's JSON output."""
+    with av.open(file_path, metadata_errors='ignore', timeout=PROBE_TIMEOUT) as container:
+        data = {
+            'format': {
+                'size': os.path.getsize(file_path),
+                'format_name': container.format.name
             },
-            'audio_tracks': [],
-            'subtitle_tracks': [],
-            'chapters': 0
+            'streams': []
         }
         
-        # Format information
-        if 'format' in data:
-            format_info = data['format']
+        if container.duration is not None:
+            data['format']['duration'] = container.duration / av.time_base
+        if container.bit_rate:
+            data['format']['bit_rate'] = container.bit_rate
+        
+        for stream in container.streams:
+            codec_context = stream.codec_context
+            entry = {
+                'index': stream.index,
+                'codec_type': stream.type,
+                # Only the tags the parser reads are kept
+                'tags': {key: stream.metadata[key] for key in ('language', 'title') if key in stream.metadata},
+                # Only the flags the parser reads are extracted
+                'disposition': {
+                    'default': int(av.stream.Disposition.default in stream.disposition),
+                    'forced': int(av.stream.Disposition.forced in stream.disposition)
+                }
+            }
             
-            # Duration
-            if 'duration' in format_info:
-                duration_seconds = float(format_info['duration'])
-                hours = int(duration_seconds // 3600)
-                minutes = int((duration_seconds % 3600) // 60)
-                seconds = int(duration_seconds % 60)
-                video_info['duration'] = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+            if codec_context is None:
+                data['streams'].append(entry)
+                continue
+            
+            entry['codec_name'] = codec_context.name
+            if codec_context.bit_rate:
+                entry['bit_rate'] = codec_context.bit_rate
+            if codec_context.profile:
+                entry['profile'] = codec_context.profile
+            
+            if stream.type == 'video':
+                entry['width'] = codec_context.width
+                entry['height'] = codec_context.height
+                if stream.base_rate:
+                    entry['r_frame_rate'] = f"{stream.base_rate.numerator}/{stream.base_rate.denominator}"
+                if codec_context.pix_fmt:
+                    entry['pix_fmt'] = codec_context.pix_fmt
+                if codec_context.display_aspect_ratio:
+                    aspect = codec_context.display_aspect_ratio
+                    entry['display_aspect_ratio'] = f"{aspect.numerator}:{aspect.denominator}"
             
-            # File size
-            if 'size' in format_info:
-                size_bytes = int(format_info['size'])
-                for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-                    if size_bytes < 1024.0:
-                        video_info['size'] = f"{size_bytes:.1f} {unit}"
-                        break
-                    size_bytes /= 1024.0
+            elif stream.type == 'audio':
+                entry['channels'] = codec_context.channels
+                entry['sample_rate'] = codec_context.sample_rate
+                if codec_context.layout:
+                    entry['channel_layout'] = codec_context.layout.name
             
-            # Overall bitrate
-            if 'bit_rate' in format_info:
-                bitrate_bps = int(format_info['bit_rate'])
-                video_info['bitrate'] = f"{bitrate_bps / 1000:.0f} kbps"
+            data['streams'].append(entry)
+        
+        return data
+
+def probe_file(file_path):
+    """Read raw stream metadata using PyAV, falling back to ffprobe."""
+    # Probing in-process avoids spawning an ffprobe process per file
+    if av is not None:
+        try:
+            return probe_with_av(file_path)
+        except av.ExitError:
+            # The read timed out; ffprobe would stall on the same file
+            return None
+        except av.FFmpegError:
+            pass
+    
+    return run_ffprobe(file_path)
+
+def parse_probe_data(data):
+    """Format ffprobe-shaped probe output into the video info structure."""
+    # Initialize comprehensive video info structure
+    video_info = {
+        'duration': None,
+        'size': None,
+        'bitrate': None,
+        'container': None,
+        'video': {
+            'codec': None,
+            'resolution': None,
+            'framerate': None,
+            'bitrate': None,
+            'profile': None,
+            'pixel_format': None,
+            'aspect_ratio': None
+        },
+        'audio_tracks': [],
+        'subtitle_tracks': [],
+        'chapters': 0
+    }
+    
+    # Format information
+    if 'format' in data:
+        format_info = data['format']
+        
+        # Duration
+        if 'duration' in format_info:
+            video_info['duration'] = format_duration(float(format_info['duration']))
+        
+        # File size
+        if 'size' in format_info:
+            video_info['size'] = human_size(int(format_info['size']))
+        
+        # Overall bitrate
+        if 'bit_rate' in format_info:
+            video_info['bitrate'] = format_bitrate(int(format_info['bit_rate']))
+        
+        # Container format
+        if 'format_name' in format_info:
+            video_info['container'] = format_info['format_name'].upper()
+    
+    # Stream information
+    if 'streams' in data:
+        for i, stream in enumerate(data['streams']):
+            stream_type = stream.get('codec_type', 'unknown')
+            tags = stream.get('tags', {})
+            disposition = stream.get('disposition', {})
             
-            # Container format
-            if 'format_name' in format_info:
-                video_info['container'] = format_info['format_name'].upper()
-        
-        # Stream information
-        if 'streams' in data:
-            for i, stream in enumerate(data['streams']):
-                stream_type = stream.get('codec_type', 'unknown')
+            if stream_type == 'video':
+                # Video stream details
+                video_info['video']['codec'] = stream.get('codec_name', 'Unknown').upper()
                 
-                if stream_type == 'video':
-                    # Video stream details
-                    video_info['video']['codec'] = stream.get('codec_name', 'Unknown').upper()
-                    
-                    if 'width' in stream and 'height' in stream:
-                        width, height = stream['width'], stream['height']
-                        video_info['video']['resolution'] = f"{width}×{height}"
-                        
-                        # Determine resolution category
-                        if height >= 2160:
-                            video_info['video']['resolution'] += " (4K)"
-                        elif height >= 1440:
-                            video_info['video']['resolution'] += " (1440p)"
-                        elif height >= 1080:
-                            video_info['video']['resolution'] += " (1080p)"
-                        elif height >= 720:
-                            video_info['video']['resolution'] += " (720p)"
-                        elif height >= 480:
-                            video_info['video']['resolution'] += " (480p)"
-                    
-                    # Frame rate
-                    if 'r_frame_rate' in stream:
-                        framerate = stream['r_frame_rate']
-                        if '/' in framerate:
-                            num, den = framerate.split('/')
-                            if int(den) != 0:
-                                fps = int(num) / int(den)
-                                video_info['video']['framerate'] = f"{fps:.2f} fps"
-                    
-                    # Video bitrate
-                    if 'bit_rate' in stream:
-                        bitrate_bps = int(stream['bit_rate'])
-                        video_info['video']['bitrate'] = f"{bitrate_bps / 1000:.0f} kbps"
-                    
-                    # Profile and pixel format
-                    if 'profile' in stream:
-                        video_info['video']['profile'] = stream['profile']
-                    
-                    if 'pix_fmt' in stream:
-                        video_info['video']['pixel_format'] = stream['pix_fmt']
-                    
-                    # Aspect ratio
-                    if 'display_aspect_ratio' in stream:
-                        video_info['video']['aspect_ratio'] = stream['display_aspect_ratio']
+                if 'width' in stream and 'height' in stream:
+                    width, height = stream['width'], stream['height']
+                    video_info['video']['resolution'] = f"{width}×{height}"
                     
-                    # Check if video codec is problematic
-                    codec_name = stream.get('codec_name', '').lower()
-                    video_info['video']['is_problematic'] = is_video_problematic(codec_name, CODEC_CONFIG)
+                    # Determine resolution category
+                    label = RESOLUTION_LABELS[bisect_right(RESOLUTION_THRESHOLDS, height)]
+                    if label:
+                        video_info['video']['resolution'] += label
                 
-                elif stream_type == 'audio':
-                    # Audio track details
-                    audio_track = {
-                        'index': i,
-                        'codec': stream.get('codec_name', 'Unknown').upper(),
-                        'channels': stream.get('channels', 'Unknown'),
-                        'sample_rate': None,
-                        'bitrate': None,
-                        'language': stream.get('tags', {}).get('language', 'Unknown'),
-                        'title': stream.get('tags', {}).get('title', ''),
-                        'disposition': stream.get('disposition', {}),
-                        'is_problematic': False  # Will be set below
-                    }
-                    
-                    # Sample rate
-                    if 'sample_rate' in stream:
-                        sample_rate = int(stream['sample_rate'])
-                        audio_track['sample_rate'] = f"{sample_rate / 1000:.1f} kHz"
-                    
-                    # Audio bitrate
-                    if 'bit_rate' in stream:
-                        bitrate_bps = int(stream['bit_rate'])
-                        audio_track['bitrate'] = f"{bitrate_bps / 1000:.0f} kbps"
-                    
-                    # Channel layout description
-                    if 'channel_layout' in stream:
-                        layout = stream['channel_layout']
-                        audio_track['channel_layout'] = layout
-                    elif audio_track['channels'] != 'Unknown':
-                        channels = audio_track['channels']
-                        if channels == 1:
-                            audio_track['channel_layout'] = 'Mono'
-                        elif channels == 2:
-                            audio_track['channel_layout'] = 'Stereo'
-                        elif channels == 6:
-                            audio_track['channel_layout'] = '5.1'
-                        elif channels == 8:
-                            audio_track['channel_layout'] = '7.1'
-                        else:
-                            audio_track['channel_layout'] = f'{channels} channels'
-                    
-                    # Check if codec is problematic
-                    codec_name = stream.get('codec_name', '').lower()
-                    audio_track['is_problematic'] = is_audio_problematic(codec_name, CODEC_CONFIG)
-                    
-                    video_info['audio_tracks'].append(audio_track)
+                # Frame rate
+                if 'r_frame_rate' in stream:
+                    video_info['video']['framerate'] = format_framerate(stream['r_frame_rate'])
                 
-                elif stream_type == 'subtitle':
-                    # Subtitle track details
-                    subtitle_track = {
-                        'index': i,
-                        'codec': stream.get('codec_name', 'Unknown').upper(),
-                        'language': stream.get('tags', {}).get('language', 'Unknown'),
-                        'title': stream.get('tags', {}).get('title', ''),
-                        'forced': stream.get('disposition', {}).get('forced', 0) == 1,
-                        'default': stream.get('disposition', {}).get('default', 0) == 1
-                    }
-                    
-                    video_info['subtitle_tracks'].append(subtitle_track)
+                # Video bitrate
+                if 'bit_rate' in stream:
+                    video_info['video']['bitrate'] = format_bitrate(int(stream['bit_rate']))
+                
+                # Profile and pixel format
+                if 'profile' in stream:
+                    video_info['video']['profile'] = stream['profile']
+                
+                if 'pix_fmt' in stream:
+                    video_info['video']['pixel_format'] = stream['pix_fmt']
+                
+                # Aspect ratio
+                if 'display_aspect_ratio' in stream:
+                    video_info['video']['aspect_ratio'] = stream['display_aspect_ratio']
+            
+            elif stream_type == 'audio':
+                # Audio track details
+                audio_track = {
+                    'index': i,
+                    'codec': stream.get('codec_name', 'Unknown').upper(),
+                    'channels': stream.get('channels', 'Unknown'),
+                    'sample_rate': None,
+                    'bitrate': None,
+                    'language': tags.get('language', 'Unknown'),
+                    'title': tags.get('title', ''),
+                    'disposition': {
+                        'default': disposition.get('default', 0),
+                        'forced': disposition.get('forced', 0)
+                    },
+                    'is_problematic': False  # Set by get_video_info
+                }
+                
+                # Sample rate
+                if 'sample_rate' in stream:
+                    sample_rate = int(stream['sample_rate'])
+                    audio_track['sample_rate'] = f"{sample_rate / 1000:.1f} kHz"
+                
+                # Audio bitrate
+                if 'bit_rate' in stream:
+                    audio_track['bitrate'] = format_bitrate(int(stream['bit_rate']))
+                
+                # Channel layout description
+                if 'channel_layout' in stream:
+                    layout = stream['channel_layout']
+                    audio_track['channel_layout'] = layout
+                elif audio_track['channels'] != 'Unknown':
+                    channels = audio_track['channels']
+                    if channels == 1:
+                        audio_track['channel_layout'] = 'Mono'
+                    elif channels == 2:
+                        audio_track['channel_layout'] = 'Stereo'
+                    elif channels == 6:
+                        audio_track['channel_layout'] = '5.1'
+                    elif channels == 8:
+                        audio_track['channel_layout'] = '7.1'
+                    else:
+                        audio_track['channel_layout'] = f'{channels} channels'
+                
+                video_info['audio_tracks'].append(audio_track)
+            
+            elif stream_type == 'subtitle':
+                # Subtitle track details
+                subtitle_track = {
+                    'index': i,
+                    'codec': stream.get('codec_name', 'Unknown').upper(),
+                    'language': tags.get('language', 'Unknown'),
+                    'title': tags.get('title', ''),
+                    'forced': disposition.get('forced', 0) == 1,
+                    'default': disposition.get('default', 0) == 1
+                }
+                
+                video_info['subtitle_tracks'].append(subtitle_track)
+    
+    return video_info
+
+def get_video_info(file_path, dir_entries=None):
+    """Extract comprehensive video metadata using PyAV or ffprobe.
+    
+    dir_entries may hold the subtitle filenames in the file's directory, as collected by a
+    previous scan, to avoid listing the directory again for sidecar subtitles.
+    """
+    try:
+        data = cached_probe_data(file_path)
+        
+        if data is None:
+            return None
+        
+        video_info = parse_probe_data(data)
+        
+        # Problematic flags depend on the current codec config, so they are
+        # evaluated here rather than stored in the metadata cache
+        if video_info['video'].get('codec'):
+            video_info['video']['is_problematic'] = is_video_problematic(video_info['video']['codec'])
+        
+        for audio_track in video_info['audio_tracks']:
+            audio_track['is_problematic'] = is_audio_problematic(audio_track['codec'])
         
         # Check for external subtitle files
         external_subs = []
         base_path = os.path.splitext(file_path)[0]
-        subtitle_extensions = ['.srt', '.ass', '.ssa', '.sub', '.idx', '.vtt']
         
         try:
             directory = os.path.dirname(file_path)
             filename_base = os.path.splitext(os.path.basename(file_path))[0]
+            filename_base_lower = filename_base.lower()
             
-            for file in os.listdir(directory):
-                if any(file.lower().endswith(ext) for ext in subtitle_extensions):
-                    if file.lower().startswith(filename_base.lower()):
-                        # Extract language from filename if possible
-                        lang_match = None
-                        for lang_code in ['en', 'es', 'fr', 'de', 'it', 'pt', 'ja', 'ko', 'zh']:
-                            if lang_code in file.lower():
-                                lang_match = lang_code
-                                break
-                        
-                        external_subs.append({
-                            'filename': file,
-                            'language': lang_match or 'Unknown',
-                            'format': os.path.splitext(file)[1][1:].upper()
-                        })
+            if dir_entries is None:
+                dir_entries = os.listdir(directory)
+            
+            for file in dir_entries:
+                if not file.lower().startswith(filename_base_lower):
+                    continue
+                
+                # Language and format both come from one match on the part after the video name
+                match = SUBTITLE_SUFFIX_RE.fullmatch(file, len(filename_base))
+                if not match:
+                    continue
+                
+                language, extension = match.groups()
+                external_subs.append({
+                    'filename': file,
+                    'language': language.lower() if language else 'Unknown',
+                    'format': extension.upper()
+                })
         except:
             pass
         
@@ -377,6 +648,7 @@ def get_video_info(file_path):
         video_info['compatibility'] = {
             'primary_audio_problematic': audio_problematic,
             'primary_audio_codec': primary_audio['codec'] if primary_audio else None,
+            'primary_audio_index': primary_audio['index'] if primary_audio else None,
             'video_problematic': video_problematic,
             'video_codec': video_info['video'].get('codec', None),
             'needs_remux': audio_problematic or video_problematic,
@@ -392,32 +664,215 @@ def get_video_info(file_path):
 
 def is_video_file(filename):
     """Check if file is a supported video format."""
-    return Path(filename).suffix.lower() in SUPPORTED_EXTENSIONS
+    return filename.lower().endswith(SUPPORTED_EXT_TUPLE)
 
-def count_videos_recursive(directory_path, max_depth=10):
-    """Recursively count video files in a directory and its subdirectories."""
-    if max_depth <= 0:
-        return 0
+def is_within_media_root(path):
+    """Check that a path resolves to MEDIA_ROOT or somewhere below it."""
+    try:
+        real_path = os.path.realpath(path)
+    except (OSError, ValueError):
+        return False
     
-    video_count = 0
+    # Comparing with a trailing separator also accepts MEDIA_ROOT itself
+    # and rejects siblings that merely share its prefix
+    return (real_path + os.sep).startswith(MEDIA_ROOT_REAL)
+
+def is_listable_entry(entry):
+    """Check that a directory entry stays inside MEDIA_ROOT once symlinks are followed."""
+    # Only symlinks can point elsewhere; plain entries share their parent's location
+    return not entry.is_symlink() or is_within_media_root(entry.path)
+
+def load_folder_count_cache():
+    """Load persisted per-directory scan results from file."""
     try:
-        for item in os.listdir(directory_path):
-            item_path = os.path.join(directory_path, item)
-            
+        if os.path.exists(COUNT_CACHE_FILE):
+            with open(COUNT_CACHE_FILE, 'r') as f:
+                data = json.load(f)
+            # Folders removed while the server was down would otherwise never be evicted
+            return {path: tuple(value) for path, value in data.items() if os.path.isdir(path)}
+    except Exception as e:
+        print(f"Warning: Failed to load folder count cache: {e}")
+    
+    return {}
+
+def save_folder_count_cache():
+    """Persist per-directory scan results if any changed since the last save."""
+    global FOLDER_COUNT_DIRTY
+    
+    with FOLDER_COUNT_SAVE_LOCK:
+        with FOLDER_COUNT_LOCK:
+            if not FOLDER_COUNT_DIRTY:
+                return
+            snapshot = dict(FOLDER_COUNT_CACHE)
+            FOLDER_COUNT_DIRTY = False
+        
+        try:
+            # Write to a temporary file first so a crash never leaves a truncated cache.
+            # stdlib json round-trips the surrogates of non-UTF-8 folder names.
+            temp_file = COUNT_CACHE_FILE + '.tmp'
+            with open(temp_file, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(temp_file, COUNT_CACHE_FILE)
+        except Exception as e:
+            print(f"Warning: Failed to save folder count cache: {e}")
+
+# Per-directory scan results: path -> (mtime_ns, direct video count, subdirectory paths).
+# A directory's mtime changes whenever a direct child is added, removed or renamed,
+# so each level is revalidated with a single stat() instead of a full listing. Only
+# changed directories are rescanned, and results survive restarts via COUNT_CACHE_FILE,
+# which is written in the background a few seconds after the memo changes.
+FOLDER_COUNT_SAVE_DELAY = 5
+FOLDER_MTIME_RACY_NS = 2_000_000_000
+FOLDER_COUNT_CACHE = load_folder_count_cache()
+FOLDER_COUNT_DIRTY = False
+FOLDER_COUNT_LOCK = threading.Lock()
+FOLDER_COUNT_SAVE_LOCK = threading.Lock()
+
+# Flush changes still waiting on the save timer when the server stops
+atexit.register(save_folder_count_cache)
+
+def mark_folder_counts_dirty():
+    """Flag the memo as changed, scheduling a background save if none is pending."""
+    global FOLDER_COUNT_DIRTY
+    
+    with FOLDER_COUNT_LOCK:
+        schedule_save = not FOLDER_COUNT_DIRTY
+        FOLDER_COUNT_DIRTY = True
+    
+    # Persist off the request path; later changes before the save ride along with it
+    if schedule_save:
+        timer = threading.Timer(FOLDER_COUNT_SAVE_DELAY, save_folder_count_cache)
+        timer.daemon = True
+        timer.start()
+
+def forget_folder_counts(paths):
+    """Drop memoized scan results for directories and everything below them."""
+    paths = set(paths)
+    prefixes = tuple(path + os.sep for path in paths)
+    
+    with FOLDER_COUNT_LOCK:
+        stale = [path for path in FOLDER_COUNT_CACHE if path in paths or path.startswith(prefixes)]
+        for path in stale:
+            del FOLDER_COUNT_CACHE[path]
+    
+    if stale:
+        mark_folder_counts_dirty()
+
+def scan_folder_counts(directory_path):
+    """Return the direct video count and subdirectories of a directory, memoized on its mtime."""
+    scan_time_ns = time.time_ns()
+    
+    try:
+        mtime_ns = os.stat(directory_path).st_mtime_ns
+    except FileNotFoundError:
+        forget_folder_counts([directory_path])
+        raise
+    
+    with FOLDER_COUNT_LOCK:
+        cached = FOLDER_COUNT_CACHE.get(directory_path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1], cached[2]
+    
+    video_count = 0
+    subdirectories = []
+    
+    # DirEntry type checks reuse the readdir result instead of stat()ing each item
+    with os.scandir(directory_path) as entries:
+        for entry in entries:
             try:
-                if os.path.isfile(item_path) and is_video_file(item):
+                if not is_listable_entry(entry):
+                    continue
+                if entry.is_file() and is_video_file(entry.name):
                     video_count += 1
-                elif os.path.isdir(item_path):
+                elif entry.is_dir():
                     # Skip system directories and hidden directories
-                    if not item.startswith('.') and item != 'System Volume Information':
-                        video_count += count_videos_recursive(item_path, max_depth - 1)
+                    if not entry.name.startswith('.') and entry.name != 'System Volume Information':
+                        subdirectories.append(entry.path)
             except (PermissionError, OSError):
                 # Skip directories/files we can't access
                 continue
-                
+    
+    # Subdirectories that were removed or renamed away take their memoized subtrees with them
+    if cached:
+        removed = set(cached[2]).difference(subdirectories)
+        if removed:
+            forget_folder_counts(removed)
+    
+    # FAT and SMB keep mtimes in coarse ticks, so a file added in the same tick as
+    # this scan would leave the mtime unchanged; such recent results are not memoized
+    if mtime_ns >= scan_time_ns - FOLDER_MTIME_RACY_NS:
+        return video_count, subdirectories
+    
+    with FOLDER_COUNT_LOCK:
+        FOLDER_COUNT_CACHE[directory_path] = (mtime_ns, video_count, subdirectories)
+    mark_folder_counts_dirty()
+    
+    return video_count, subdirectories
+
+def walk_video_count(directory_path, max_depth=10, limit=None, stop=None):
+    """Count video files in a directory tree, stopping once limit is reached or stop is set."""
+    video_count = 0
+    
+    # Explicit LIFO stack of (path, remaining depth) instead of Python recursion
+    stack = [(directory_path, max_depth)]
+    while stack:
+        if stop is not None and stop.is_set():
+            break
+        
+        path, depth = stack.pop()
+        if depth <= 0:
+            continue
+        
+        try:
+            direct_count, subdirectories = scan_folder_counts(path)
+        except (PermissionError, OSError):
+            # Can't read the directory
+            continue
+        
+        video_count += direct_count
+        if limit is not None and video_count >= limit:
+            break
+        
+        stack.extend((subdirectory, depth - 1) for subdirectory in subdirectories)
+    
+    return video_count
+
+def count_videos_recursive(directory_path, max_depth=10, limit=None):
+    """Recursively count video files in a directory and its subdirectories.
+    
+    When limit is given, the walk stops once at least that many videos are found.
+    """
+    if max_depth <= 0:
+        return 0
+    
+    try:
+        video_count, subdirectories = scan_folder_counts(directory_path)
     except (PermissionError, OSError):
         # Can't read the directory
-        pass
+        return 0
+    
+    if not subdirectories or (limit is not None and video_count >= limit):
+        return video_count
+    
+    # Each top-level subtree is walked on the scan pool, so listings on separate
+    # disks or slow network mounts overlap instead of running back to back.
+    # Walkers get the budget left after this folder's own videos, and stop lets
+    # walkers that already started quit once the total is known.
+    remaining = limit - video_count if limit is not None else None
+    stop = threading.Event()
+    futures = [
+        SCAN_EXECUTOR.submit(walk_video_count, subdirectory, max_depth - 1, remaining, stop)
+        for subdirectory in subdirectories
+    ]
+    try:
+        for future in as_completed(futures):
+            video_count += future.result()
+            if limit is not None and video_count >= limit:
+                break
+    finally:
+        stop.set()
+        for future in futures:
+            future.cancel()
     
     return video_count
 
@@ -426,42 +881,44 @@ def scan_directory(path):
     try:
         items = []
         
-        for item in sorted(os.listdir(path)):
-            item_path = os.path.join(path, item)
-            
-            if os.path.isdir(item_path):
-                # Skip system directories
-                if item.startswith('.') or item == 'System Volume Information':
-                    continue
+        # Entries are filtered as they stream in and only the kept items are sorted,
+        # so other files never take part in the sort
+        with os.scandir(path) as it:
+            for entry in it:
+                item = entry.name
                 
-                # Count video files recursively in subdirectory
-                video_count = count_videos_recursive(item_path)
+                # Symlinks leading outside the media root are hidden, like the endpoints reject them
+                if not is_listable_entry(entry):
+                    continue
                 
-                items.append({
-                    'type': 'folder',
-                    'name': item,
-                    'video_count': video_count
-                })
-            
-            elif is_video_file(item):
-                # Get file size
-                try:
-                    size_bytes = os.path.getsize(item_path)
-                    # Convert to human readable format
-                    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-                        if size_bytes < 1024.0:
-                            size_str = f"{size_bytes:.1f} {unit}"
-                            break
-                        size_bytes /= 1024.0
-                except:
-                    size_str = "Unknown"
+                if entry.is_dir():
+                    # Skip system directories
+                    if item.startswith('.') or item == 'System Volume Information':
+                        continue
+                    
+                    # Recursive video counts are fetched separately via /api/folder-count
+                    # so the listing can be returned without walking every subtree
+                    items.append({
+                        'type': 'folder',
+                        'name': item,
+                        'video_count': None
+                    })
                 
-                items.append({
-                    'type': 'file',
-                    'name': item,
-                    'size': size_str,
-                    'path': item_path
-                })
+                elif is_video_file(item):
+                    # Get file size
+                    try:
+                        size_str = human_size(entry.stat().st_size)
+                    except OSError:
+                        size_str = "Unknown"
+                    
+                    items.append({
+                        'type': 'file',
+                        'name': item,
+                        'size': size_str,
+                        'path': entry.path
+                    })
+        
+        items.sort(key=lambda item: item['name'])
         
         return items
     
@@ -469,6 +926,36 @@ def scan_directory(path):
         print(f"Error scanning directory {path}: {e}")
         return []
 
+# Recent folder listings: path -> (directory mtime_ns, time listed, items)
+BROWSE_CACHE = {}
+BROWSE_CACHE_LOCK = threading.Lock()
+
+def cached_scan_directory(path):
+    """Return scan_directory results, reusing a recent listing if the folder is unchanged."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return scan_directory(path)
+    
+    now = time.monotonic()
+    
+    with BROWSE_CACHE_LOCK:
+        cached = BROWSE_CACHE.get(path)
+    # Adding or removing entries changes the mtime; the TTL bounds staleness of file sizes
+    if cached and cached[0] == mtime_ns and now - cached[1] < BROWSE_CACHE_SECONDS:
+        return cached[2]
+    
+    items = scan_directory(path)
+    
+    with BROWSE_CACHE_LOCK:
+        # Drop expired listings so only recently browsed folders are kept
+        expired = [key for key, value in BROWSE_CACHE.items() if now - value[1] >= BROWSE_CACHE_SECONDS]
+        for key in expired:
+            del BROWSE_CACHE[key]
+        BROWSE_CACHE[path] = (mtime_ns, now, items)
+    
+    return items
+
 @app.route('/')
 def index():
     """Main page - show media root contents."""
@@ -485,14 +972,14 @@ def browse():
     else:
         full_path = MEDIA_ROOT
     
-    # Security check
-    if not os.path.commonpath([MEDIA_ROOT, full_path]) == MEDIA_ROOT:
+    # Security check on the resolved path, so '..' segments and symlinks cannot escape
+    if not is_within_media_root(full_path):
         return jsonify({'error': 'Invalid path'}), 400
     
     if not os.path.exists(full_path):
         return jsonify({'error': 'Path not found'}), 404
     
-    items = scan_directory(full_path)
+    items = cached_scan_directory(full_path)
     
     # Build breadcrumb
     breadcrumb = []
@@ -512,6 +999,33 @@ def browse():
         'items': items
     })
 
+@app.route('/api/folder-count')
+def folder_count():
+    """API endpoint to count video files in a folder and its subfolders."""
+    path = request.args.get('path', '')
+    
+    # Ensure path is within media root
+    if path:
+        full_path = os.path.join(MEDIA_ROOT, path.lstrip('/'))
+    else:
+        full_path = MEDIA_ROOT
+    
+    # Security check on the resolved path, so '..' segments and symlinks cannot escape
+    if not is_within_media_root(full_path):
+        return jsonify({'error': 'Invalid path'}), 400
+    
+    if not os.path.isdir(full_path):
+        return jsonify({'error': 'Path not found'}), 404
+    
+    # Walk one past the limit so a folder with exactly the limit is not shown as "N+"
+    count = count_videos_recursive(full_path, limit=FOLDER_COUNT_LIMIT + 1)
+    
+    return jsonify({
+        'path': path,
+        'count': min(count, FOLDER_COUNT_LIMIT),
+        'truncated': count > FOLDER_COUNT_LIMIT
+    })
+
 @app.route('/api/video-info')
 def video_info():
     """API endpoint to get video metadata."""
@@ -520,8 +1034,8 @@ def video_info():
     if not file_path:
         return jsonify({'error': 'No file path provided'}), 400
     
-    # Security check
-    if not os.path.commonpath([MEDIA_ROOT, file_path]) == MEDIA_ROOT:
+    # Security check on the resolved path, so '..' segments and symlinks cannot escape
+    if not is_within_media_root(file_path):
         return jsonify({'error': 'Invalid path'}), 400
     
     if not os.path.exists(file_path):
@@ -542,7 +1056,7 @@ def get_config():
 @app.route('/api/config', methods=['POST'])
 def update_config():
     """API endpoint to update codec configuration."""
-    global CODEC_CONFIG
+    global CODEC_CONFIG, PROBLEMATIC_CODECS
     
     try:
         new_config = request.get_json()
@@ -561,9 +1075,16 @@ def update_config():
         if not isinstance(problematic.get('video', []), list):
             return jsonify({'error': 'Invalid video codecs format'}), 400
         
+        problematic_sets = build_problematic_sets(new_config)
+        
         # Save the configuration
-        if save_codec_config(new_config):
-            CODEC_CONFIG = new_config
+        with CONFIG_LOCK:
+            saved = save_codec_config(new_config)
+            if saved:
+                CODEC_CONFIG = new_config
+                PROBLEMATIC_CODECS = problematic_sets
+        
+        if saved:
             return jsonify({'success': True, 'message': 'Configuration updated successfully'})
         else:
             return jsonify({'error': 'Failed to save configuration'}), 500
@@ -590,37 +1111,157 @@ def get_available_codecs():
         'video': common_video_codecs
     })
 
-def scan_media_files_recursive(directory_path, max_files=None, max_depth=10):
-    """Recursively scan for video files and return their paths."""
-    if max_depth <= 0:
-        return []
+def scan_media_files_recursive(directory_path, max_files=None, max_depth=10, dir_index=None):
+    """Recursively scan for video files and return their paths.
     
+    If dir_index is a dict, the subtitle filenames in each scanned directory are
+    stored in it keyed by directory path, so per-file sidecar lookups only look at
+    the directory's subtitle candidates instead of listing it again.
+    """
     video_files = []
-    try:
-        for item in sorted(os.listdir(directory_path)):
-            if max_files and len(video_files) >= max_files:
-                break
-                
-            item_path = os.path.join(directory_path, item)
-            
+    
+    # Explicit LIFO stack of (path, remaining depth), with depth None marking a
+    # video file. Each directory's children are pushed in reverse name order so
+    # results come out in the same depth-first, sorted order as a recursive walk.
+    stack = [(directory_path, max_depth)]
+    while stack:
+        if max_files and len(video_files) >= max_files:
+            break
+        
+        path, depth = stack.pop()
+        if depth is None:
+            video_files.append(path)
+            continue
+        if depth <= 0:
+            continue
+        
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except (PermissionError, OSError):
+            # Can't read the directory
+            continue
+        
+        children = []
+        subtitles = []
+        for entry in entries:
             try:
-                if os.path.isfile(item_path) and is_video_file(item):
-                    video_files.append(item_path)
-                elif os.path.isdir(item_path):
+                if not is_listable_entry(entry):
+                    continue
+                if entry.is_file():
+                    if is_video_file(entry.name):
+                        children.append((entry.path, None))
+                    elif entry.name.lower().endswith(SUBTITLE_EXT_TUPLE):
+                        subtitles.append(entry.name)
+                elif entry.is_dir():
                     # Skip system directories and hidden directories
-                    if not item.startswith('.') and item != 'System Volume Information':
-                        subdirectory_files = scan_media_files_recursive(item_path, max_files - len(video_files) if max_files else None, max_depth - 1)
-                        video_files.extend(subdirectory_files)
+                    if not entry.name.startswith('.') and entry.name != 'System Volume Information':
+                        children.append((entry.path, depth - 1))
             except (PermissionError, OSError):
                 # Skip directories/files we can't access
                 continue
-                
-    except (PermissionError, OSError):
-        # Can't read the directory
-        pass
+        
+        if dir_index is not None:
+            dir_index[path] = subtitles
+        
+        stack.extend(reversed(children))
     
     return video_files
 
+def analyze_one(file_path, dir_index=None):
+    """Probe a single file for bulk analysis, returning its relative path and metadata."""
+    relative_path = os.path.relpath(file_path, MEDIA_ROOT)
+    dir_entries = dir_index.get(os.path.dirname(file_path)) if dir_index is not None else None
+    try:
+        return relative_path, get_video_info(file_path, dir_entries)
+    except Exception as e:
+        print(f"Error analyzing {file_path}: {e}")
+        return relative_path, None
+
+def analyze_files(file_paths, dir_index=None):
+    """Analyze files on the shared pool, yielding (relative_path, video_info) as each completes.
+    
+    Only ANALYSIS_QUEUE_DEPTH probes are queued at a time, so concurrent analyses
+    interleave on the pool and cancelling one leaves little queued work behind.
+    """
+    file_iter = iter(file_paths)
+    pending = set()
+    try:
+        while True:
+            while len(pending) < ANALYSIS_QUEUE_DEPTH:
+                file_path = next(file_iter, None)
+                if file_path is None:
+                    break
+                pending.add(ANALYSIS_EXECUTOR.submit(analyze_one, file_path, dir_index))
+            
+            if not pending:
+                return
+            
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+def update_stats(stats, relative_path, video_info):
+    """Fold one analyzed file into the bulk analysis statistics."""
+    if not video_info or 'compatibility' not in video_info:
+        return
+    
+    compatibility = video_info['compatibility']
+    
+    # Count compatibility status
+    if compatibility['needs_remux']:
+        stats['problematic_files'] += 1
+        
+        # Track specific issue types
+        has_audio_issue = compatibility.get('primary_audio_problematic', False)
+        has_video_issue = compatibility.get('video_problematic', False)
+        
+        if has_audio_issue:
+            stats['audio_issues'] += 1
+        if has_video_issue:
+            stats['video_issues'] += 1
+        if has_audio_issue and has_video_issue:
+            stats['both_issues'] += 1
+        
+        # Add to problematic files list
+        issues = []
+        if has_audio_issue:
+            issues.append(compatibility.get('primary_audio_codec', 'Unknown'))
+        if has_video_issue:
+            issues.append(compatibility.get('video_codec', 'Unknown'))
+        
+        stats['problematic_files_list'].append({
+            'path': relative_path,
+            'name': os.path.basename(relative_path),
+            'issues': issues,
+            'audio_codec': compatibility.get('primary_audio_codec'),
+            'video_codec': compatibility.get('video_codec'),
+            'size': video_info.get('size', 'Unknown')
+        })
+    else:
+        stats['compatible_files'] += 1
+    
+    # Track codec usage from the compatibility summary get_video_info already built
+    if compatibility.get('primary_audio_codec'):
+        audio_codec = compatibility['primary_audio_codec'].lower()
+        stats['codec_breakdown']['audio'][audio_codec] += 1
+    
+    if compatibility.get('video_codec'):
+        video_codec = compatibility['video_codec'].lower()
+        stats['codec_breakdown']['video'][video_codec] += 1
+
+def finalize_stats(stats):
+    """Compute the compatibility percentage and turn codec counters into plain dicts."""
+    stats['codec_breakdown'] = {kind: dict(counts) for kind, counts in stats['codec_breakdown'].items()}
+    
+    if stats['total_files'] > 0:
+        stats['compatibility_percentage'] = round((stats['compatible_files'] / stats['total_files']) * 100, 1)
+    else:
+        stats['compatibility_percentage'] = 0
+
 @app.route('/api/bulk-analysis')
 def bulk_analysis():
     """API endpoint for bulk media library analysis."""
@@ -633,7 +1274,10 @@ def bulk_analysis():
             max_files = 50
         
         # Scan for all video files
-        video_files = scan_media_files_recursive(MEDIA_ROOT, max_files)
+        dir_index = {}
+        video_files = scan_media_files_recursive(MEDIA_ROOT, max_files, dir_index=dir_index)
+        if not max_files:
+            prune_metadata_cache(video_files)
         
         # Initialize statistics
         stats = {
@@ -644,75 +1288,21 @@ def bulk_analysis():
             'video_issues': 0,
             'both_issues': 0,
             'codec_breakdown': {
-                'audio': {},
-                'video': {}
+                'audio': Counter(),
+                'video': Counter()
             },
             'problematic_files_list': []
         }
         
-        # Analyze each file
-        for file_path in video_files:
+        # Analyze files concurrently on the shared pool; ffprobe runs are independent
+        for relative_path, video_info in analyze_files(video_files, dir_index):
             try:
-                video_info = get_video_info(file_path)
-                if not video_info or 'compatibility' not in video_info:
-                    continue
-                
-                compatibility = video_info['compatibility']
-                relative_path = os.path.relpath(file_path, MEDIA_ROOT)
-                
-                # Count compatibility status
-                if compatibility['needs_remux']:
-                    stats['problematic_files'] += 1
-                    
-                    # Track specific issue types
-                    has_audio_issue = compatibility.get('primary_audio_problematic', False)
-                    has_video_issue = compatibility.get('video_problematic', False)
-                    
-                    if has_audio_issue:
-                        stats['audio_issues'] += 1
-                    if has_video_issue:
-                        stats['video_issues'] += 1
-                    if has_audio_issue and has_video_issue:
-                        stats['both_issues'] += 1
-                    
-                    # Add to problematic files list
-                    issues = []
-                    if has_audio_issue:
-                        issues.append(compatibility.get('primary_audio_codec', 'Unknown'))
-                    if has_video_issue:
-                        issues.append(compatibility.get('video_codec', 'Unknown'))
-                    
-                    stats['problematic_files_list'].append({
-                        'path': relative_path,
-                        'name': os.path.basename(file_path),
-                        'issues': issues,
-                        'audio_codec': compatibility.get('primary_audio_codec'),
-                        'video_codec': compatibility.get('video_codec'),
-                        'size': video_info.get('size', 'Unknown')
-                    })
-                else:
-                    stats['compatible_files'] += 1
-                
-                # Track codec usage
-                if video_info.get('audio_tracks'):
-                    primary_audio = get_primary_audio_track(video_info['audio_tracks'])
-                    if primary_audio:
-                        audio_codec = primary_audio['codec'].lower()
-                        stats['codec_breakdown']['audio'][audio_codec] = stats['codec_breakdown']['audio'].get(audio_codec, 0) + 1
-                
-                if video_info.get('video', {}).get('codec'):
-                    video_codec = video_info['video']['codec'].lower()
-                    stats['codec_breakdown']['video'][video_codec] = stats['codec_breakdown']['video'].get(video_codec, 0) + 1
-                    
+                update_stats(stats, relative_path, video_info)
             except Exception as e:
-                print(f"Error analyzing {file_path}: {e}")
+                print(f"Error analyzing {relative_path}: {e}")
                 continue
         
-        # Calculate percentages
-        if stats['total_files'] > 0:
-            stats['compatibility_percentage'] = round((stats['compatible_files'] / stats['total_files']) * 100, 1)
-        else:
-            stats['compatibility_percentage'] = 0
+        finalize_stats(stats)
         
         return jsonify(stats)
         
@@ -751,7 +1341,9 @@ def bulk_analysis_progress():
             yield "data: " + json.dumps({'status': 'starting', 'message': 'Scanning for video files...'}) + "\n\n"
             
             # Scan for all video files
-            video_files = scan_media_files_recursive(MEDIA_ROOT)
+            dir_index = {}
+            video_files = scan_media_files_recursive(MEDIA_ROOT, dir_index=dir_index)
+            prune_metadata_cache(video_files)
             total_files = len(video_files)
             
             # Load existing cache for incremental analysis (unless forced)
@@ -781,85 +1373,41 @@ def bulk_analysis_progress():
                 'video_issues': 0,
                 'both_issues': 0,
                 'codec_breakdown': {
-                    'audio': {},
-                    'video': {}
+                    'audio': Counter(),
+                    'video': Counter()
                 },
                 'problematic_files_list': []
             }
             
-            # Analyze each file with progress updates
-            for index, file_path in enumerate(files_to_analyze, 1):
-                try:
-                    # Send progress update
-                    filename = os.path.basename(file_path)
-                    yield "data: " + json.dumps({
-                        'status': 'progress',
-                        'total_files': total_files,
-                        'current_file': index,
-                        'current_filename': filename,
-                        'message': f'Analyzing {index}/{total_files}: {filename}'
-                    }) + "\n\n"
-                    
-                    video_info = get_video_info(file_path)
-                    if not video_info or 'compatibility' not in video_info:
-                        continue
-                    
-                    compatibility = video_info['compatibility']
-                    relative_path = os.path.relpath(file_path, MEDIA_ROOT)
-                    
-                    # Count compatibility status
-                    if compatibility['needs_remux']:
-                        stats['problematic_files'] += 1
-                        
-                        # Track specific issue types
-                        has_audio_issue = compatibility.get('primary_audio_problematic', False)
-                        has_video_issue = compatibility.get('video_problematic', False)
-                        
-                        if has_audio_issue:
-                            stats['audio_issues'] += 1
-                        if has_video_issue:
-                            stats['video_issues'] += 1
-                        if has_audio_issue and has_video_issue:
-                            stats['both_issues'] += 1
-                        
-                        # Add to problematic files list
-                        issues = []
-                        if has_audio_issue:
-                            issues.append(compatibility.get('primary_audio_codec', 'Unknown'))
-                        if has_video_issue:
-                            issues.append(compatibility.get('video_codec', 'Unknown'))
-                        
-                        stats['problematic_files_list'].append({
-                            'path': relative_path,
-                            'name': os.path.basename(file_path),
-                            'issues': issues,
-                            'audio_codec': compatibility.get('primary_audio_codec'),
-                            'video_codec': compatibility.get('video_codec'),
-                            'size': video_info.get('size', 'Unknown')
-                        })
-                    else:
-                        stats['compatible_files'] += 1
-                    
-                    # Track codec usage
-                    if video_info.get('audio_tracks'):
-                        primary_audio = get_primary_audio_track(video_info['audio_tracks'])
-                        if primary_audio:
-                            audio_codec = primary_audio['codec'].lower()
-                            stats['codec_breakdown']['audio'][audio_codec] = stats['codec_breakdown']['audio'].get(audio_codec, 0) + 1
-                    
-                    if video_info.get('video', {}).get('codec'):
-                        video_codec = video_info['video']['codec'].lower()
-                        stats['codec_breakdown']['video'][video_codec] = stats['codec_breakdown']['video'].get(video_codec, 0) + 1
+            # Analyze files concurrently, reporting progress in completion order
+            results = analyze_files(files_to_analyze, dir_index)
+            last_emit = time.monotonic()
+            try:
+                for index, (relative_path, video_info) in enumerate(results, 1):
+                    try:
+                        update_stats(stats, relative_path, video_info)
                         
-                except Exception as e:
-                    print(f"Error analyzing {file_path}: {e}")
-                    continue
+                        # Throttle progress frames so fast cache hits don't send one per file
+                        now = time.monotonic()
+                        if (index % PROGRESS_CHECKPOINT_INTERVAL == 0
+                                or now - last_emit >= PROGRESS_MIN_SECONDS):
+                            last_emit = now
+                            yield "data: " + json.dumps({
+                                'status': 'progress',
+                                'total_files': total_files,
+                                'current_file': index,
+                                'current_filename': os.path.basename(relative_path),
+                                'compatible_files': stats['compatible_files'],
+                                'problematic_files': stats['problematic_files']
+                            }) + "\n\n"
+                    except Exception as e:
+                        print(f"Error analyzing {relative_path}: {e}")
+                        continue
+            finally:
+                # Drop queued probes if the client disconnected mid-analysis
+                results.close()
             
-            # Calculate percentages
-            if stats['total_files'] > 0:
-                stats['compatibility_percentage'] = round((stats['compatible_files'] / stats['total_files']) * 100, 1)
-            else:
-                stats['compatibility_percentage'] = 0
+            finalize_stats(stats)
             
             # Save results to cache
             save_analysis_cache(stats)
@@ -887,5 +1435,7 @@ def bulk_analysis_progress():
 if __name__ == '__main__':
     print(f"Starting Media Info Web Browser...")
     print(f"Media root: {MEDIA_ROOT}")
+    print(f"Metadata probing: {'PyAV (in-process)' if av is not None else 'ffprobe subprocess per file'}")
     print(f"Server will be available at http://{HOST}:{PORT}")
-    app.run(debug=DEBUG, host=HOST, port=PORT)
+    # Each request (including long-lived SSE streams) is served on its own thread
+    app.run(debug=DEBUG, host=HOST, port=PORT, threaded=True)
@@ -172,7 +172,7 @@ class DashboardManager {
                         break;
                         
                     case 'progress':
-                        const percentage = Math.round((data.current_file / data.total_files) * 100);
+                        const percentage = data.total_files ? Math.round((data.current_file / data.total_files) * 100) : 0;
                         progressText.textContent = `Analyzing library... ${percentage}%`;
                         progressDetail.innerHTML = `${data.current_file}/${data.total_files}<br>${data.current_filename || 'Processing...'}`;
                         break;
@@ -88,14 +88,19 @@ class MediaBrowser {
                         ${item.name}
                     </div>
                     <div class="card-subtitle">
-                        ${item.video_count} video file${item.video_count !== 1 ? 's' : ''}
+                        Counting videos...
                     </div>
                 </div>
             `;
 
+            const folderPath = this.currentPath ? `${this.currentPath}/${item.name}` : item.name;
+            const subtitleDiv = card.querySelector('.card-subtitle');
+
+            // Load recursive video count in background
+            this.loadFolderCount(folderPath, subtitleDiv);
+
             card.addEventListener('click', () => {
-                const newPath = this.currentPath ? `${this.currentPath}/${item.name}` : item.name;
-                this.loadContent(newPath);
+                this.loadContent(folderPath);
             });
 
         } else if (item.type === 'file') {
@@ -155,6 +160,22 @@ class MediaBrowser {
         return card;
     }
 
+    async loadFolderCount(folderPath, subtitleElement) {
+        try {
+            const response = await fetch(`/api/folder-count?path=${encodeURIComponent(folderPath)}`);
+            const data = await response.json();
+            
+            if (!response.ok) {
+                throw new Error(data.error || 'Failed to count videos');
+            }
+            
+            const countLabel = data.truncated ? `${data.count}+` : data.count;
+            subtitleElement.textContent = `${countLabel} video file${data.count !== 1 ? 's' : ''}`;
+        } catch (error) {
+            subtitleElement.textContent = '';
+        }
+    }
+
     async loadCompatibilityInfo(filePath, badgeElement) {
         try {
             const response = await fetch(`/api/video-info?path=${encodeURIComponent(filePath)}`);